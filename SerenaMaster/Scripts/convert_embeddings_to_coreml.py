@@ -4,9 +4,11 @@ Convert embedding model to CoreML format for use in Serena.
 Downloads a sentence transformer model and converts it to CoreML.
 """
 
+import argparse
 import os
 import sys
 import coremltools as ct
+import numpy as np
 import torch
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
@@ -15,8 +17,83 @@ from pathlib import Path
 os.environ['PYTORCH_ENABLE_MPS_FALLBACK'] = '1'
 torch.set_default_device('cpu')
 
-def convert_embeddings_to_coreml():
-    """Download and convert sentence transformer model to CoreML."""
+# Must change whenever the pooling or base model changes, because stored vectors
+# from different versions aren't comparable (see LocalEmbeddingService.modelVersion)
+EMBEDDING_VERSION = "minilm-l6-meanpool-v1"
+
+def report_compute_device_usage(mlmodel):
+    """Print which compute device CoreML plans to run each op on.
+
+    Ops the Neural Engine can't handle fall back to the CPU, and range-shaped
+    inputs usually keep the model off it entirely, so check this before
+    restricting the app to CPU_AND_NE. Needs macOS 14.4+ and coremltools 8;
+    skipped otherwise.
+    """
+    try:
+        from coremltools.models.compute_plan import MLComputePlan
+
+        compute_plan = MLComputePlan.load_from_path(
+            path=mlmodel.get_compiled_model_path(),
+            compute_units=ct.ComputeUnit.CPU_AND_NE
+        )
+    except Exception as e:
+        print(f"⚠️  Skipping compute device report: {e}")
+        return
+
+    device_counts = {}
+    main_function = compute_plan.model_structure.program.functions["main"]
+    for operation in main_function.block.operations:
+        usage = compute_plan.get_compute_device_usage_for_mlprogram_operation(operation)
+        if usage is None:
+            continue
+        device = type(usage.preferred_compute_device).__name__
+        device_counts[device] = device_counts.get(device, 0) + 1
+
+    print("🧮 Planned compute devices:")
+    for device, count in sorted(device_counts.items()):
+        print(f"   - {device}: {count} ops")
+
+def export_onnx(wrapped_model, input_ids, attention_mask, output_path):
+    """Export the wrapped model to ONNX with dynamic batch and sequence axes.
+
+    Used for benchmarking through onnxruntime's CoreMLExecutionProvider;
+    the CoreML package stays the production artifact, so a failed export is
+    reported but never aborts the conversion. Returns whether the export
+    succeeded.
+    """
+    print(f"📦 Exporting ONNX model to: {output_path}")
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapped_model,
+                (input_ids, attention_mask),
+                str(output_path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["embedding"],
+                opset_version=17,
+                dynamic_axes={
+                    "input_ids": {0: "B", 1: "L"},
+                    "attention_mask": {0: "B", 1: "L"},
+                    "embedding": {0: "B"}
+                },
+                # dynamic_axes is a TorchScript-exporter option; newer torch
+                # defaults to the dynamo exporter, which needs onnxscript
+                dynamo=False
+            )
+    except Exception as e:
+        print(f"⚠️  ONNX export failed, CoreML model is unaffected: {e}")
+        return False
+
+    print("✅ ONNX export complete")
+    return True
+
+def convert_embeddings_to_coreml(emit_onnx=False):
+    """Download and convert sentence transformer model to CoreML.
+
+    With emit_onnx, also export the same wrapped model to ONNX. Returns the
+    CoreML package path and whether the requested ONNX export succeeded
+    (True when none was requested).
+    """
 
     print("🚀 Starting embedding model conversion...")
 
@@ -44,10 +121,16 @@ def convert_embeddings_to_coreml():
     transformer = transformer.cpu()
     transformer.eval()
 
-    # Create example input for tracing
-    example_text = "This is an example sentence for model tracing."
+    # Create example input for tracing. Use a batch of several sentences so the
+    # trace doesn't bake in batch size 1.
+    example_texts = [
+        "This is an example sentence for model tracing.",
+        "Serena embeds many chunks at once.",
+        "Batched inputs share a single prediction call.",
+        "Hello world."
+    ]
     inputs = tokenizer(
-        example_text,
+        example_texts,
         padding="max_length",
         max_length=128,
         truncation=True,
@@ -58,7 +141,7 @@ def convert_embeddings_to_coreml():
     input_ids = inputs['input_ids'].cpu()
     attention_mask = inputs['attention_mask'].cpu()
 
-    # Create a wrapper that returns only the embeddings
+    # Create a wrapper that returns the sentence embedding
     class EmbeddingModelWrapper(torch.nn.Module):
         def __init__(self, model):
             super().__init__()
@@ -66,8 +149,12 @@ def convert_embeddings_to_coreml():
 
         def forward(self, input_ids, attention_mask):
             outputs = self.model(input_ids=input_ids, attention_mask=attention_mask)
-            # Return only the last hidden state (embeddings)
-            return outputs.last_hidden_state
+            # Masked mean-pool over tokens and L2-normalize inside the model, so it
+            # returns one 384-d vector instead of the full per-token hidden state
+            mask = attention_mask.unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+            summed = (outputs.last_hidden_state * mask).sum(dim=1)
+            counts = mask.sum(dim=1).clamp(min=1)
+            return torch.nn.functional.normalize(summed / counts, p=2, dim=1)
 
     wrapped_model = EmbeddingModelWrapper(transformer)
     wrapped_model.eval()
@@ -83,35 +170,84 @@ def convert_embeddings_to_coreml():
     # Convert to CoreML
     print("   Converting to CoreML (this may take several minutes)...")
 
+    # Flexible sequence length so short inputs don't have to be padded to 128,
+    # and a flexible batch so up to 32 texts share one predict call; the
+    # defaults keep single padded 128-token callers working unchanged
+    batch_size = ct.RangeDim(lower_bound=1, upper_bound=32, default=1)
+    seq_len = ct.RangeDim(lower_bound=1, upper_bound=128, default=128)
+
     mlmodel = ct.convert(
         traced_model,
         inputs=[
-            ct.TensorType(name="input_ids", shape=(1, 128), dtype=int),
-            ct.TensorType(name="attention_mask", shape=(1, 128), dtype=int)
+            ct.TensorType(name="input_ids", shape=(batch_size, seq_len), dtype=np.int32),
+            ct.TensorType(name="attention_mask", shape=(batch_size, seq_len), dtype=np.int32)
         ],
+        # LocalEmbeddingService reads "output_0" as a Float32 buffer; without this
+        # coremltools picks its own name and keeps the output in FP16
+        outputs=[ct.TensorType(name="output_0", dtype=np.float32)],
         minimum_deployment_target=ct.target.macOS13,
+        compute_precision=ct.precision.FLOAT16,
+        compute_units=ct.ComputeUnit.CPU_AND_NE,
         convert_to="mlprogram"
     )
 
+    # Quantize weights to int8 (MiniLM holds up well to weight-only quantization)
+    print("   Quantizing weights to int8...")
+    op_config = ct.optimize.coreml.OpLinearQuantizerConfig(
+        mode="linear_symmetric",
+        dtype="int8"
+    )
+    mlmodel = ct.optimize.coreml.linear_quantize_weights(
+        mlmodel,
+        config=ct.optimize.coreml.OptimizationConfig(global_config=op_config)
+    )
+
+    # Tag the embedding space so the app can tell these vectors apart from the
+    # older [CLS]-token model and re-embed what it has stored
+    mlmodel.user_defined_metadata["serena.embedding_version"] = EMBEDDING_VERSION
+
     # Save the model
     print(f"💾 Saving model to: {output_path}")
     mlmodel.save(str(output_path))
 
+    report_compute_device_usage(mlmodel)
+
+    onnx_ok = True
+    if emit_onnx:
+        onnx_ok = export_onnx(wrapped_model, input_ids, attention_mask, output_dir / "embedding.onnx")
+
     print("✅ Conversion complete!")
     print(f"📁 Model saved to: {output_path}")
     print(f"\n📊 Model info:")
     print(f"   - Model: {model_name}")
-    print(f"   - Max sequence length: 128 tokens")
-    print(f"   - Embedding dimension: 384")
+    print(f"   - Batch size: 1-32 (flexible)")
+    print(f"   - Sequence length: 1-128 tokens (flexible)")
+    print(f"   - Embedding dimension: 384 (mean-pooled, L2-normalized)")
+    print(f"   - Embedding version: {EMBEDDING_VERSION}")
+    print(f"   - Precision: FP16 compute, int8 weights")
     print(f"\nNext step: Compile with CoreML compiler:")
     print(f"xcrun coremlcompiler compile {output_path} Models/")
     print(f"This will create: Models/embedding_model.mlmodelc")
 
-    return output_path
+    return output_path, onnx_ok
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the embedding model to CoreML.")
+    parser.add_argument(
+        "--emit-onnx",
+        action="store_true",
+        help="also export Models/embedding.onnx for onnxruntime benchmarking"
+    )
+    args = parser.parse_args()
+
     try:
-        convert_embeddings_to_coreml()
+        _, onnx_ok = convert_embeddings_to_coreml(emit_onnx=args.emit_onnx)
     except Exception as e:
         print(f"❌ Error: {e}", file=sys.stderr)
         sys.exit(1)
+
+    # The CoreML model is saved either way, but a requested ONNX export that
+    # failed must still fail the run so scripted benchmarks notice
+    if not onnx_ok:
+        print("❌ Error: ONNX export was requested but failed", file=sys.stderr)
+        sys.exit(1)
@@ -6,6 +6,7 @@ public actor ConversationMemoryService {
     public static let shared = ConversationMemoryService()
 
     private let storageDirectory: URL
+    private let embedder: MemoryEmbedder
     private let conversationHistoryPath: URL
     private let embeddingsIndexPath: URL
     private let tierConfigPath: URL
@@ -16,13 +17,28 @@ public actor ConversationMemoryService {
     private var userContext: UserContext?
     private var tierConfig: UserTierConfig
 
+    // Semantic search results, reused until the embeddings index changes.
+    // indexVersion is bumped on every index write so a search that was
+    // suspended across a write never caches results from the old index.
+    private var searchCache: [SearchCacheKey: [SemanticSearchResult]] = [:]
+    private var searchCacheOrder: [SearchCacheKey] = []
+    private var indexVersion = 0
+
     // Configuration
     private let semanticSearchThreshold: Float = 0.7
+    private let searchCacheCapacity = 256
 
-    private init() {
+    /// Storage and embedding model are injectable so tests can run against a
+    /// temporary directory without loading the CoreML model
+    init(storageDirectory: URL? = nil, embedder: MemoryEmbedder = .local) {
         // Setup storage paths
-        let documentsPath = FileManager.default.urls(for: .documentDirectory, in: .userDomainMask).first!
-        self.storageDirectory = documentsPath.appendingPathComponent("SerenaNet/Memory")
+        if let storageDirectory {
+            self.storageDirectory = storageDirectory
+        } else {
+            let documentsPath = FileManager.default.urls(for: .documentDirectory, in: .userDomainMask).first!
+            self.storageDirectory = documentsPath.appendingPathComponent("SerenaNet/Memory")
+        }
+        self.embedder = embedder
         self.conversationHistoryPath = storageDirectory.appendingPathComponent("conversation_history.json")
         self.embeddingsIndexPath = storageDirectory.appendingPathComponent("embeddings_index.json")
         self.tierConfigPath = storageDirectory.appendingPathComponent("tier_config.json")
@@ -47,6 +63,7 @@ public actor ConversationMemoryService {
         // Initialize LocalEmbeddingService
         try? await LocalEmbeddingService.shared.initialize()
         await loadFromStorage()
+        await reembedStaleEmbeddings()
 
         // Auto-cleanup based on tier if needed
         if tierConfig.shouldRunCleanup() {
@@ -86,12 +103,8 @@ public actor ConversationMemoryService {
         print("💾 Storing message with semantic embedding...")
 
         // Generate embedding for the message content using LocalEmbeddingService
-        let embedding = try await LocalEmbeddingService.shared.embed(text: message.content)
-
-        // Create text embedding entry
-        let textEmbedding = TextEmbedding(
+        let textEmbedding = try await makeEmbedding(
             text: message.content,
-            embedding: embedding,
             metadata: [
                 "message_id": message.id.uuidString,
                 "conversation_id": conversationId.uuidString,
@@ -110,6 +123,7 @@ public actor ConversationMemoryService {
         // Add to cache
         conversationHistory.append(storedMessage)
         embeddingsIndex[textEmbedding.id] = textEmbedding
+        invalidateSearchCache()
 
         // Enforce capacity limits
         await enforceCapacityLimits()
@@ -139,21 +153,32 @@ public actor ConversationMemoryService {
 
     /// Search for relevant messages using semantic similarity
     public func semanticSearch(query: String, limit: Int = 10, minSimilarity: Float? = nil) async throws -> [SemanticSearchResult] {
+        let threshold = minSimilarity ?? semanticSearchThreshold
+        let cacheKey = SearchCacheKey(query: query, limit: limit, threshold: threshold)
+
+        if let cached = searchCache[cacheKey] {
+            touchSearchCacheKey(cacheKey)
+            return cached
+        }
+
         print("🔍 Performing semantic search for: '\(query.prefix(50))...'")
+        let version = indexVersion
 
         // Generate embedding for query
-        let queryEmbedding = try await LocalEmbeddingService.shared.embed(text: query)
+        let queryEmbedding = try await embedder.embed(query)
+        let modelVersion = await embedder.modelVersion()
 
         // Calculate similarity with all stored embeddings
         var results: [(embedding: TextEmbedding, similarity: Float)] = []
 
-        for (_, textEmbedding) in embeddingsIndex {
+        // Vectors from another model version live in a different embedding space,
+        // so they are skipped until reembedStaleEmbeddings() refreshes them
+        for (_, textEmbedding) in embeddingsIndex where textEmbedding.modelVersion == modelVersion {
             let similarity = await LocalEmbeddingService.shared.cosineSimilarity(queryEmbedding, textEmbedding.embedding)
             results.append((embedding: textEmbedding, similarity: similarity))
         }
 
         // Filter by minimum similarity threshold
-        let threshold = minSimilarity ?? semanticSearchThreshold
         results = results.filter { $0.similarity >= threshold }
 
         // Sort by similarity (highest first)
@@ -174,6 +199,10 @@ public actor ConversationMemoryService {
 
         print("✅ Found \(searchResults.count) relevant messages (threshold: \(threshold))")
 
+        if version == indexVersion {
+            cacheSearchResults(searchResults, for: cacheKey)
+        }
+
         return searchResults
     }
 
@@ -290,10 +319,8 @@ public actor ConversationMemoryService {
 
         // Generate embeddings for user facts
         for fact in context.facts {
-            let embedding = try await LocalEmbeddingService.shared.embed(text: fact)
-            let textEmbedding = TextEmbedding(
+            let textEmbedding = try await makeEmbedding(
                 text: fact,
-                embedding: embedding,
                 metadata: [
                     "type": "user_context",
                     "user_name": context.name,
@@ -302,6 +329,7 @@ public actor ConversationMemoryService {
             )
             embeddingsIndex[textEmbedding.id] = textEmbedding
         }
+        invalidateSearchCache()
 
         await persistToStorage()
         print("✅ User context stored")
@@ -322,10 +350,8 @@ public actor ConversationMemoryService {
         self.userContext = context
 
         // Generate embedding for new fact
-        let embedding = try await LocalEmbeddingService.shared.embed(text: fact)
-        let textEmbedding = TextEmbedding(
+        let textEmbedding = try await makeEmbedding(
             text: fact,
-            embedding: embedding,
             metadata: [
                 "type": "user_context",
                 "user_name": context.name,
@@ -333,6 +359,7 @@ public actor ConversationMemoryService {
             ]
         )
         embeddingsIndex[textEmbedding.id] = textEmbedding
+        invalidateSearchCache()
 
         await persistToStorage()
     }
@@ -437,6 +464,7 @@ public actor ConversationMemoryService {
         embeddingsIndex = embeddingsIndex.filter { id, _ in
             validEmbeddingIds.contains(id) || embeddingsIndex[id]?.metadata["type"] == "user_context"
         }
+        invalidateSearchCache()
 
         let removedCount = initialCount - conversationHistory.count
 
@@ -461,6 +489,7 @@ public actor ConversationMemoryService {
         conversationHistory.removeAll()
         embeddingsIndex.removeAll()
         userContext = nil
+        invalidateSearchCache()
         await persistToStorage()
         print("🗑️ All conversation memory cleared")
     }
@@ -483,12 +512,18 @@ public actor ConversationMemoryService {
             }
 
             conversationHistory.removeFirst(excessCount)
+            invalidateSearchCache()
 
             print("⚠️ Capacity limit reached (\(tierConfig.currentTier.displayName) tier: \(maxMessages) messages), removed \(excessCount) oldest messages")
         }
     }
 
     private func loadFromStorage() async {
+        // The history and embeddings files grow with every stored message, so
+        // they are memory-mapped and decoded from the mapping rather than
+        // copied onto the heap first. persistToStorage replaces them atomically,
+        // so a live mapping never sees the file rewritten underneath it.
+
         // Load tier config
         if let tierData = try? Data(contentsOf: tierConfigPath),
            let loadedConfig = try? JSONDecoder().decode(UserTierConfig.self, from: tierData) {
@@ -497,14 +532,14 @@ public actor ConversationMemoryService {
         }
 
         // Load conversation history
-        if let historyData = try? Data(contentsOf: conversationHistoryPath),
+        if let historyData = try? Data(contentsOf: conversationHistoryPath, options: .mappedIfSafe),
            let history = try? JSONDecoder().decode([StoredMessage].self, from: historyData) {
             conversationHistory = history
             print("📂 Loaded \(history.count) messages from storage")
         }
 
         // Load embeddings index
-        if let indexData = try? Data(contentsOf: embeddingsIndexPath) {
+        if let indexData = try? Data(contentsOf: embeddingsIndexPath, options: .mappedIfSafe) {
             if let index = try? JSONDecoder().decode([String: TextEmbedding].self, from: indexData) {
                 // Convert String keys back to UUIDs
                 embeddingsIndex = Dictionary(uniqueKeysWithValues:
@@ -513,6 +548,7 @@ public actor ConversationMemoryService {
                         return (uuid, value)
                     }
                 )
+                invalidateSearchCache()
                 print("📂 Loaded \(embeddingsIndex.count) embeddings from storage")
             }
         }
@@ -530,10 +566,77 @@ public actor ConversationMemoryService {
         }
     }
 
+    /// Embed text and stamp the result with the model version that produced it
+    private func makeEmbedding(text: String, metadata: [String: String]) async throws -> TextEmbedding {
+        let embedding = try await embedder.embed(text)
+
+        var stampedMetadata = metadata
+        stampedMetadata[TextEmbedding.modelVersionKey] = await embedder.modelVersion()
+
+        return TextEmbedding(text: text, embedding: embedding, metadata: stampedMetadata)
+    }
+
+    /// Re-embed stored vectors produced by a different model version. Similarity
+    /// scores are only meaningful between vectors from the same embedding space.
+    ///
+    /// Runs inside `initialize()` and costs one CoreML inference per stale stored
+    /// vector, so the first launch after a model change is slower.
+    private func reembedStaleEmbeddings() async {
+        guard await embedder.isReady() else { return }
+
+        let currentVersion = await embedder.modelVersion()
+        let staleIds = embeddingsIndex.filter { $0.value.modelVersion != currentVersion }.map { $0.key }
+        guard !staleIds.isEmpty else { return }
+
+        print("🔄 Re-embedding \(staleIds.count) stored vectors for model \(currentVersion)...")
+
+        for id in staleIds {
+            guard let text = embeddingsIndex[id]?.text else { continue }
+
+            do {
+                let vector = try await embedder.embed(text)
+
+                // The actor is reentrant across the await: the entry may have been
+                // deleted or cleared meanwhile, so only update it if it still exists
+                guard embeddingsIndex[id] != nil else { continue }
+                embeddingsIndex[id]?.embedding = vector
+                embeddingsIndex[id]?.metadata[TextEmbedding.modelVersionKey] = currentVersion
+            } catch {
+                print("⚠️ Re-embedding stopped, stale vectors stay excluded from search: \(error)")
+                break
+            }
+        }
+
+        invalidateSearchCache()
+        await persistToStorage()
+    }
+
+    private func cacheSearchResults(_ results: [SemanticSearchResult], for key: SearchCacheKey) {
+        if searchCache[key] == nil && searchCache.count >= searchCacheCapacity {
+            let oldest = searchCacheOrder.removeFirst()
+            searchCache.removeValue(forKey: oldest)
+        }
+
+        searchCache[key] = results
+        touchSearchCacheKey(key)
+    }
+
+    /// Move a key to the most-recently-used end of the eviction order
+    private func touchSearchCacheKey(_ key: SearchCacheKey) {
+        searchCacheOrder.removeAll { $0 == key }
+        searchCacheOrder.append(key)
+    }
+
+    private func invalidateSearchCache() {
+        indexVersion += 1
+        searchCache.removeAll()
+        searchCacheOrder.removeAll()
+    }
+
     private func persistToStorage() async {
         // Persist conversation history
         if let historyData = try? JSONEncoder().encode(conversationHistory) {
-            try? historyData.write(to: conversationHistoryPath)
+            try? historyData.write(to: conversationHistoryPath, options: .atomic)
         }
 
         // Persist embeddings index (convert UUID keys to strings for JSON)
@@ -542,7 +645,7 @@ public actor ConversationMemoryService {
         )
 
         if let indexData = try? JSONEncoder().encode(stringKeyedIndex) {
-            try? indexData.write(to: embeddingsIndexPath)
+            try? indexData.write(to: embeddingsIndexPath, options: .atomic)
         }
     }
 
@@ -569,6 +672,27 @@ public actor ConversationMemoryService {
 
 // MARK: - Supporting Types
 
+/// Cache key for semantic search results
+private struct SearchCacheKey: Hashable {
+    let query: String
+    let limit: Int
+    let threshold: Float
+}
+
+/// The embedding model calls ConversationMemoryService depends on
+struct MemoryEmbedder: Sendable {
+    var embed: @Sendable (String) async throws -> [Float]
+    var modelVersion: @Sendable () async -> String
+    var isReady: @Sendable () async -> Bool
+
+    /// Backed by the on-device CoreML model
+    static let local = MemoryEmbedder(
+        embed: { try await LocalEmbeddingService.shared.embed(text: $0) },
+        modelVersion: { await LocalEmbeddingService.shared.modelVersion },
+        isReady: { await LocalEmbeddingService.shared.isReady }
+    )
+}
+
 /// A message stored with conversation and embedding references
 public struct StoredMessage: Codable, Identifiable {
     public let id: UUID
@@ -586,9 +710,12 @@ public struct StoredMessage: Codable, Identifiable {
 
 /// Text with its embedding
 public struct TextEmbedding: Codable, Identifiable {
+    /// Metadata key recording which embedding model version produced the vector
+    public static let modelVersionKey = "embedding_version"
+
     public let id: UUID
     public let text: String
-    public let embedding: [Float]
+    public var embedding: [Float]
     public let timestamp: Date
     public var metadata: [String: String]
 
@@ -599,6 +726,12 @@ public struct TextEmbedding: Codable, Identifiable {
         self.timestamp = Date()
         self.metadata = metadata
     }
+
+    /// Model version that produced the vector; entries saved before versioning
+    /// was added came from the original [CLS]-token model
+    public var modelVersion: String {
+        metadata[Self.modelVersionKey] ?? LocalEmbeddingService.legacyModelVersion
+    }
 }
 
 /// Search result
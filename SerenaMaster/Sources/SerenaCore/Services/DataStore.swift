@@ -4,8 +4,19 @@ import CryptoKit
 
 public class DataStore: DataStoreProtocol {
     private var db: Connection?
+    private var readDb: Connection?
     private let encryption: EncryptionManager
     
+    // Opened once per process and shared by every DataStore instance: a single
+    // writer, plus a read-only connection that WAL lets run alongside it
+    private static var sharedWriter: Connection?
+    private static var sharedReader: Connection?
+    private static let connectionLock = NSLock()
+    
+    // Stored in PRAGMA user_version; bump whenever createTables() changes so
+    // existing databases pick up the new DDL
+    private static let schemaVersion: Int32 = 1
+    
     // Table definitions
     private let conversations = Table("conversations")
     private let messages = Table("messages")
@@ -34,17 +45,60 @@ public class DataStore: DataStoreProtocol {
     }
     
     private func setupDatabase() throws {
+        Self.connectionLock.lock()
+        defer { Self.connectionLock.unlock() }
+        
+        if let writer = Self.sharedWriter, let reader = Self.sharedReader {
+            db = writer
+            readDb = reader
+            return
+        }
+        
         let documentsPath = FileManager.default.urls(for: .documentDirectory, 
                                                    in: .userDomainMask).first!
         let dbPath = documentsPath.appendingPathComponent("serenanet.db")
         
-        db = try Connection(dbPath.path)
+        let writer = try Connection(dbPath.path)
+        try Self.configure(writer, readonly: false)
+        db = writer
         try createTables()
+        
+        // Opened after the writer so the schema and WAL mode already exist
+        let reader = try Connection(dbPath.path, readonly: true)
+        try Self.configure(reader, readonly: true)
+        readDb = reader
+        
+        Self.sharedWriter = writer
+        Self.sharedReader = reader
+    }
+    
+    private static func configure(_ connection: Connection, readonly: Bool) throws {
+        if !readonly {
+            // WAL lets readers proceed while a save is in flight, and NORMAL sync
+            // only fsyncs at checkpoints instead of on every commit
+            try connection.execute("""
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                PRAGMA wal_autocheckpoint = 1000;
+                """)
+        }
+        
+        try connection.execute("""
+            PRAGMA temp_store = MEMORY;
+            PRAGMA mmap_size = 268435456;
+            PRAGMA cache_size = -65536;
+            PRAGMA foreign_keys = ON;
+            """)
     }
     
     private func createTables() throws {
         guard let db = db else { throw DataStoreError.databaseNotInitialized }
         
+        // Schema is already current; skip re-running the DDL
+        if let version = db.userVersion, version >= Self.schemaVersion {
+            return
+        }
+        
         // Create conversations table
         try db.run(conversations.create(ifNotExists: true) { t in
             t.column(convId, primaryKey: true)
@@ -70,8 +124,18 @@ public class DataStore: DataStoreProtocol {
         })
         
         // Create indexes for better performance
-        try db.run(messages.createIndex(msgConversationId, ifNotExists: true))
         try db.run(messages.createIndex(msgTimestamp, ifNotExists: true))
+        
+        // loadMessages filters by conversation and orders by timestamp, which the
+        // composite index answers with a range scan instead of a sort; it also
+        // covers conversation_id lookups, making the single-column index redundant
+        try db.run(messages.createIndex(msgConversationId, msgTimestamp, ifNotExists: true))
+        try db.run(messages.dropIndex(msgConversationId, ifExists: true))
+        
+        // loadConversations orders by updated_at DESC
+        try db.run(conversations.createIndex(convUpdatedAt, ifNotExists: true))
+        
+        db.userVersion = Self.schemaVersion
     }
 }
 
@@ -80,23 +144,33 @@ extension DataStore {
     public func saveConversation(_ conversation: Conversation) async throws {
         guard let db = db else { throw DataStoreError.databaseNotInitialized }
         
+        // Encrypt everything before opening the transaction so the write lock
+        // is only held for the inserts themselves
         let encryptedTitle = try encryption.encrypt(conversation.title)
+        let encryptedContents = try conversation.messages.map { try encryption.encrypt($0.content) }
         
-        try db.run(conversations.insert(or: .replace,
-            convId <- conversation.id.uuidString,
-            convTitle <- encryptedTitle,
-            convCreatedAt <- conversation.createdAt,
-            convUpdatedAt <- conversation.updatedAt
-        ))
-        
-        // Save all messages for this conversation
-        for message in conversation.messages {
-            try await saveMessage(message, conversationId: conversation.id)
+        // Write the conversation and all of its messages in one transaction
+        // so the whole save pays for a single commit instead of one per row
+        try db.transaction {
+            // Upsert rather than INSERT OR REPLACE: REPLACE deletes the existing
+            // row first, which with foreign keys on cascades to its messages
+            try db.run(conversations.upsert(
+                convId <- conversation.id.uuidString,
+                convTitle <- encryptedTitle,
+                convCreatedAt <- conversation.createdAt,
+                convUpdatedAt <- conversation.updatedAt,
+                onConflictOf: convId
+            ))
+            
+            for (message, encryptedContent) in zip(conversation.messages, encryptedContents) {
+                try saveMessage(message, encryptedContent: encryptedContent,
+                                conversationId: conversation.id, in: db)
+            }
         }
     }
     
     public func loadConversations() async throws -> [Conversation] {
-        guard let db = db else { throw DataStoreError.databaseNotInitialized }
+        guard let db = readDb else { throw DataStoreError.databaseNotInitialized }
         
         var loadedConversations: [Conversation] = []
         
@@ -129,11 +203,8 @@ extension DataStore {
         try db.run(conversation.delete())
     }
     
-    private func saveMessage(_ message: Message, conversationId: UUID) async throws {
-        guard let db = db else { throw DataStoreError.databaseNotInitialized }
-        
-        let encryptedContent = try encryption.encrypt(message.content)
-        
+    private func saveMessage(_ message: Message, encryptedContent: Data,
+                             conversationId: UUID, in db: Connection) throws {
         try db.run(messages.insert(or: .replace,
             msgId <- message.id.uuidString,
             msgConversationId <- conversationId.uuidString,
@@ -144,7 +215,7 @@ extension DataStore {
     }
     
     private func loadMessages(for conversationId: UUID) async throws -> [Message] {
-        guard let db = db else { throw DataStoreError.databaseNotInitialized }
+        guard let db = readDb else { throw DataStoreError.databaseNotInitialized }
         
         var loadedMessages: [Message] = []
         
@@ -187,7 +258,7 @@ extension DataStore {
     }
     
     public func loadUserConfig() async throws -> UserConfig {
-        guard let db = db else { throw DataStoreError.databaseNotInitialized }
+        guard let db = readDb else { throw DataStoreError.databaseNotInitialized }
         
         let query = userConfig.filter(configKey == "user_config")
         
@@ -208,9 +279,11 @@ extension DataStore {
     public func clearAllData() async throws {
         guard let db = db else { throw DataStoreError.databaseNotInitialized }
         
-        try db.run(messages.delete())
-        try db.run(conversations.delete())
-        try db.run(userConfig.delete())
+        try db.transaction {
+            try db.run(messages.delete())
+            try db.run(conversations.delete())
+            try db.run(userConfig.delete())
+        }
     }
     
     public func getDatabaseSize() throws -> Int64 {
@@ -219,7 +292,15 @@ extension DataStore {
         let dbPath = documentsPath.appendingPathComponent("serenanet.db")
         
         let attributes = try FileManager.default.attributesOfItem(atPath: dbPath.path)
-        return attributes[.size] as? Int64 ?? 0
+        var size = attributes[.size] as? Int64 ?? 0
+        
+        // Uncheckpointed writes live in the WAL file until the next checkpoint
+        let walPath = dbPath.path + "-wal"
+        if let walAttributes = try? FileManager.default.attributesOfItem(atPath: walPath) {
+            size += walAttributes[.size] as? Int64 ?? 0
+        }
+        
+        return size
     }
 }
 
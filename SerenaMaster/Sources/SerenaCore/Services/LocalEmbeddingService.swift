@@ -14,6 +14,14 @@ public class LocalEmbeddingService: ObservableObject {
     @Published public private(set) var isReady: Bool = false
     @Published public private(set) var isLoading: Bool = false
 
+    /// Embedding space of the loaded model, read from its metadata. Vectors from
+    /// different versions are not comparable.
+    @Published public private(set) var modelVersion: String = LocalEmbeddingService.legacyModelVersion
+
+    /// Version assumed for models converted before the version tag was added
+    nonisolated public static let legacyModelVersion = "minilm-l6-cls"
+    private static let modelVersionMetadataKey = "serena.embedding_version"
+
     private var mlModel: MLModel?
     private let logger = Logger(subsystem: "com.folktech.serena", category: "LocalEmbeddingService")
 
@@ -49,6 +57,10 @@ public class LocalEmbeddingService: ObservableObject {
 
             // Load the compiled CoreML model
             let configuration = MLModelConfiguration()
+            // Keep the GPU available: the model's inputs are range-shaped, which
+            // Core ML generally keeps off the Neural Engine. Only narrow this to
+            // .cpuAndNeuralEngine once the conversion script's compute device
+            // report shows the ops actually land there.
             configuration.computeUnits = .all // Use Neural Engine, GPU, and CPU
 
             logger.info("Loading CoreML model from: \(self.modelPath.path)")
@@ -56,9 +68,12 @@ public class LocalEmbeddingService: ObservableObject {
                 try MLModel(contentsOf: self.modelPath, configuration: configuration)
             }.value
 
+            let creatorMetadata = mlModel?.modelDescription.metadata[.creatorDefinedKey] as? [String: String]
+            modelVersion = creatorMetadata?[Self.modelVersionMetadataKey] ?? Self.legacyModelVersion
+
             isReady = true
             isLoading = false
-            logger.info("✅ Embedding model loaded successfully")
+            logger.info("✅ Embedding model loaded successfully (version: \(self.modelVersion))")
 
         } catch {
             isReady = false
@@ -98,7 +113,7 @@ public class LocalEmbeddingService: ObservableObject {
             }.value
 
             // Extract embedding from output
-            // The model outputs a tensor, we need to extract the [CLS] token embedding
+            // The model outputs the pooled, L2-normalized sentence embedding
             guard let outputFeature = output.featureValue(for: "output_0"),
                   let multiArray = outputFeature.multiArrayValue else {
                 throw EmbeddingError.invalidOutput
@@ -204,13 +219,13 @@ public class LocalEmbeddingService: ObservableObject {
 
     /// Extract embedding vector from MLMultiArray output
     private func extractEmbedding(from multiArray: MLMultiArray) throws -> [Float] {
-        // The output shape should be [1, sequence_length, embedding_dim]
-        // We want the [CLS] token embedding at position 0
+        // The output shape should be [1, embedding_dim]; pooling and
+        // normalization already happen inside the model
 
         var embedding: [Float] = []
         let pointer = multiArray.dataPointer.assumingMemoryBound(to: Float.self)
 
-        // Extract the first token's embedding (CLS token)
+        // Copy the single embedding row
         for i in 0..<embeddingDimension {
             embedding.append(pointer[i])
         }
@@ -31,11 +31,15 @@ class FTAIParser {
     // MARK: - Constants
     
     private static let supportedVersions = ["1.0", "1.1"]
-    private static let versionPattern = #"^version:\s*(.+)$"#
     private static let metadataPattern = #"^(\w+):\s*(.+)$"#
     private static let schemaStartPattern = #"^schema:\s*$"#
     private static let contentStartPattern = #"^content:\s*$"#
     
+    // Compiled once and shared; parse() evaluates these for every header line
+    private static let metadataRegex = try? NSRegularExpression(pattern: metadataPattern, options: [])
+    private static let schemaStartRegex = try? NSRegularExpression(pattern: schemaStartPattern, options: [])
+    private static let contentStartRegex = try? NSRegularExpression(pattern: contentStartPattern, options: [])
+    
     // MARK: - Public Methods
     
     /// Parse FTAI content from a string
@@ -67,14 +71,18 @@ class FTAIParser {
                     continue
                 }
                 
-                if let parsedVersion = try parseVersion(from: trimmedLine) {
-                    version = parsedVersion
+                // A single "key: value" match covers both the version line and
+                // metadata; section markers have no value so never match it
+                if let (key, value) = parseMetadata(from: trimmedLine) {
+                    if key == "version" {
+                        version = value
+                    } else {
+                        metadata[key] = value
+                    }
                 } else if isSchemaStart(trimmedLine) {
                     currentSection = .schema
                 } else if isContentStart(trimmedLine) {
                     currentSection = .content
-                } else if let (key, value) = parseMetadata(from: trimmedLine) {
-                    metadata[key] = value
                 }
                 
             case .schema:
@@ -151,20 +159,8 @@ class FTAIParser {
         case content
     }
     
-    private func parseVersion(from line: String) throws -> String? {
-        let regex = try NSRegularExpression(pattern: Self.versionPattern, options: [])
-        let range = NSRange(location: 0, length: line.utf16.count)
-        
-        if let match = regex.firstMatch(in: line, options: [], range: range) {
-            let versionRange = Range(match.range(at: 1), in: line)!
-            return String(line[versionRange]).trimmingCharacters(in: .whitespaces)
-        }
-        
-        return nil
-    }
-    
     private func parseMetadata(from line: String) -> (String, String)? {
-        guard let regex = try? NSRegularExpression(pattern: Self.metadataPattern, options: []) else {
+        guard let regex = Self.metadataRegex else {
             return nil
         }
         
@@ -184,7 +180,7 @@ class FTAIParser {
     }
     
     private func isSchemaStart(_ line: String) -> Bool {
-        guard let regex = try? NSRegularExpression(pattern: Self.schemaStartPattern, options: []) else {
+        guard let regex = Self.schemaStartRegex else {
             return false
         }
         
@@ -193,7 +189,7 @@ class FTAIParser {
     }
     
     private func isContentStart(_ line: String) -> Bool {
-        guard let regex = try? NSRegularExpression(pattern: Self.contentStartPattern, options: []) else {
+        guard let regex = Self.contentStartRegex else {
             return false
         }
         
@@ -0,0 +1,99 @@
+import XCTest
+@testable import SerenaCore
+
+/// Counts embedding calls so tests can tell a cached search from a fresh one
+private actor EmbedCallCounter {
+    private(set) var count = 0
+
+    func increment() {
+        count += 1
+    }
+}
+
+final class ConversationMemoryServiceTests: XCTestCase {
+    private var storageDirectory: URL!
+    private var counter: EmbedCallCounter!
+    private var service: ConversationMemoryService!
+
+    override func setUp() async throws {
+        try await super.setUp()
+        storageDirectory = FileManager.default.temporaryDirectory
+            .appendingPathComponent("ConversationMemoryServiceTests-\(UUID().uuidString)")
+
+        let counter = EmbedCallCounter()
+        self.counter = counter
+        let embedder = MemoryEmbedder(
+            embed: { _ in
+                await counter.increment()
+                return [1, 0, 0]
+            },
+            modelVersion: { "test-model" },
+            isReady: { true }
+        )
+        service = ConversationMemoryService(storageDirectory: storageDirectory, embedder: embedder)
+    }
+
+    override func tearDown() async throws {
+        try? FileManager.default.removeItem(at: storageDirectory)
+        try await super.tearDown()
+    }
+
+    func testRepeatedSearchIsServedFromCache() async throws {
+        _ = try await service.semanticSearch(query: "hello")
+        _ = try await service.semanticSearch(query: "hello")
+
+        let calls = await counter.count
+        XCTAssertEqual(calls, 1, "Second identical search should not embed the query again")
+    }
+
+    func testSearchWithDifferentParametersIsNotShared() async throws {
+        _ = try await service.semanticSearch(query: "hello", limit: 5)
+        _ = try await service.semanticSearch(query: "hello", limit: 10)
+
+        let calls = await counter.count
+        XCTAssertEqual(calls, 2)
+    }
+
+    func testLeastRecentlyUsedEntryIsEvictedAtCapacity() async throws {
+        for index in 0..<256 {
+            _ = try await service.semanticSearch(query: "query \(index)")
+        }
+
+        // Touch the oldest entry so "query 1" becomes the least recently used
+        _ = try await service.semanticSearch(query: "query 0")
+        _ = try await service.semanticSearch(query: "query 256")
+        var calls = await counter.count
+        XCTAssertEqual(calls, 257)
+
+        _ = try await service.semanticSearch(query: "query 0")
+        calls = await counter.count
+        XCTAssertEqual(calls, 257, "Recently used entry should survive eviction")
+
+        _ = try await service.semanticSearch(query: "query 1")
+        calls = await counter.count
+        XCTAssertEqual(calls, 258, "Least recently used entry should have been evicted")
+    }
+
+    func testStoreMessageInvalidatesCache() async throws {
+        _ = try await service.semanticSearch(query: "hello")
+        try await service.storeMessage(Message(content: "hello there", role: .user), conversationId: UUID())
+
+        // One call for the first search, one for the stored message
+        var calls = await counter.count
+        XCTAssertEqual(calls, 2)
+
+        let results = try await service.semanticSearch(query: "hello")
+        calls = await counter.count
+        XCTAssertEqual(calls, 3, "Search after storeMessage should not reuse cached results")
+        XCTAssertEqual(results.map { $0.text }, ["hello there"])
+    }
+
+    func testClearAllInvalidatesCache() async throws {
+        _ = try await service.semanticSearch(query: "hello")
+        await service.clearAll()
+        _ = try await service.semanticSearch(query: "hello")
+
+        let calls = await counter.count
+        XCTAssertEqual(calls, 2, "Search after clearAll should not reuse cached results")
+    }
+}
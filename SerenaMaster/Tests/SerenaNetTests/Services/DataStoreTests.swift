@@ -34,6 +34,29 @@ final class DataStoreTests: XCTestCase {
         XCTAssertEqual(loadedConversation.messages[1].content, "Hi there!")
     }
     
+    func testSaveConversationWithManyMessages() async throws {
+        var conversation = Conversation(title: "Long Conversation")
+        let baseTime = Date()
+        for index in 0..<200 {
+            conversation.addMessage(Message(
+                id: UUID(),
+                content: "Message \(index)",
+                role: index.isMultiple(of: 2) ? .user : .assistant,
+                timestamp: baseTime.addingTimeInterval(TimeInterval(index))
+            ))
+        }
+        
+        try await dataStore.saveConversation(conversation)
+        
+        let loadedConversations = try await dataStore.loadConversations()
+        XCTAssertEqual(loadedConversations.count, 1)
+        
+        let loadedMessages = loadedConversations[0].messages
+        XCTAssertEqual(loadedMessages.count, 200)
+        XCTAssertEqual(loadedMessages.first?.content, "Message 0")
+        XCTAssertEqual(loadedMessages.last?.content, "Message 199")
+    }
+    
     func testDeleteConversation() async throws {
         var conversation = Conversation(title: "Test Conversation")
         conversation.addMessage(Message(content: "Hello", role: .user))
@@ -49,6 +72,47 @@ final class DataStoreTests: XCTestCase {
         XCTAssertEqual(loadedConversations.count, 0)
     }
     
+    func testResavingConversationKeepsStoredMessages() async throws {
+        var conversation = Conversation(title: "Original Title")
+        let baseTime = Date()
+        conversation.addMessage(Message(id: UUID(), content: "First", role: .user, timestamp: baseTime))
+        conversation.addMessage(Message(id: UUID(), content: "Second", role: .assistant,
+                                        timestamp: baseTime.addingTimeInterval(1)))
+        
+        try await dataStore.saveConversation(conversation)
+        
+        // Re-save with a new title and only one of the messages; the conversation
+        // row is updated in place, so the other stored message must survive
+        let resaved = Conversation(id: conversation.id, title: "Renamed",
+                                   messages: [conversation.messages[0]],
+                                   createdAt: conversation.createdAt, updatedAt: Date())
+        try await dataStore.saveConversation(resaved)
+        
+        let loadedConversations = try await dataStore.loadConversations()
+        XCTAssertEqual(loadedConversations.count, 1)
+        XCTAssertEqual(loadedConversations[0].title, "Renamed")
+        XCTAssertEqual(loadedConversations[0].messages.map { $0.content }, ["First", "Second"])
+    }
+    
+    func testDeleteConversationRemovesMessages() async throws {
+        var conversation = Conversation(title: "To Delete")
+        conversation.addMessage(Message(content: "Hello", role: .user))
+        conversation.addMessage(Message(content: "Hi there!", role: .assistant))
+        
+        try await dataStore.saveConversation(conversation)
+        try await dataStore.deleteConversation(id: conversation.id)
+        
+        // Recreate a conversation with the same id and no messages; any message
+        // rows the delete failed to cascade to would be loaded back under it
+        let recreated = Conversation(id: conversation.id, title: "Recreated", messages: [],
+                                     createdAt: Date(), updatedAt: Date())
+        try await dataStore.saveConversation(recreated)
+        
+        let loadedConversations = try await dataStore.loadConversations()
+        XCTAssertEqual(loadedConversations.count, 1)
+        XCTAssertTrue(loadedConversations[0].messages.isEmpty)
+    }
+    
     func testSaveAndLoadUserConfig() async throws {
         let config = UserConfig(
             nickname: "TestUser",
@@ -135,11 +199,16 @@ final class DataStoreTests: XCTestCase {
                                                    in: .userDomainMask).first!
         let dbPath = documentsPath.appendingPathComponent("serenanet.db")
         
-        let dbData = try Data(contentsOf: dbPath)
-        let dbString = String(data: dbData, encoding: .utf8) ?? ""
+        // With WAL enabled, recent commits live in the -wal file until a checkpoint,
+        // so both files have to be checked
+        var dbData = try Data(contentsOf: dbPath)
+        let walPath = URL(fileURLWithPath: dbPath.path + "-wal")
+        if let walData = try? Data(contentsOf: walPath) {
+            dbData.append(walData)
+        }
         
-        // The sensitive content should not appear in plain text in the database file
-        XCTAssertFalse(dbString.contains(sensitiveContent))
+        // The sensitive content should not appear in plain text in the database files
+        XCTAssertNil(dbData.range(of: Data(sensitiveContent.utf8)))
         
         // But we should still be able to decrypt and retrieve it
         let loadedConversations = try await dataStore.loadConversations()